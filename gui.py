@@ -3,16 +3,19 @@ CineSleuth GUI - A graphical interface for the movie guessing game
 Imports core functionality from main.py
 """
 import os
+import json
+import re
 import tkinter as tk
 from tkinter import messagebox, scrolledtext
 from datetime import datetime
-import google.generativeai as genai
-from google.api_core import exceptions as google_exceptions
+import queue
 import threading
 
 from main import (
     APIKeyManager,
+    cached_turn,
     clean_output,
+    history_cache_key,
     CineSleuthError,
     APIKeyError,
     APIConnectionError,
@@ -20,7 +23,78 @@ from main import (
     AllKeysExhaustedError,
 )
 
+# Resolved once so each save doesn't re-walk dirname/join.
+_LOG_DIR = os.path.join(os.path.dirname(__file__), "logs")
+_LOG_PATH = os.path.join(_LOG_DIR, "log.txt")
+
+# Static prompt text hoisted out of the per-turn f-strings so only the
+# variable tail is interpolated each turn. Keeping the prefix byte-stable
+# across turns also lets Gemini's implicit prompt caching key on it.
+_TURN_PROMPT_HEAD = """
+                        You are a movie-detective AI playing a guessing game.
+                        The user is thinking of a movie.
+                        Previous Q&A so far:
+                        """
+
+_TURN_PROMPT_TAIL = """, and you have only 20 questions in total.
+                        You have {remaining} questions remaining.
+                        You must guess the movie within these questions.
+                        Mostly focus the last Q&A in history to narrow down.
+
+                        If you are confident, guess the movie now. Otherwise ask ONE
+                        question to narrow down the movie about its
+                            genre,
+                            Time Period / Release Year,
+                            actors
+                            actresses,
+                            director,
+                            whether Franchise vs Standalone,
+                            Setting,
+                            Main Character whether male or female lead,
+                            Plot elements,
+                            Famous scenes,
+                            themes & Tone,
+                            Cinematography style,
+                            Popularity
+                            and plots etc.
+                        Respond ONLY as JSON: {{"action": "guess", "movie": "..."}}
+                        or {{"action": "ask", "question": "..."}}
+                    """
+
+_EXPLAIN_PROMPT_TMPL = """
+                The Movie is {movie}. Explain why you could not guess it based on the Q&A history.
+                If the user's answers don't match the actual movie details, point that out politely.
+                Keep your response brief (2-3 sentences).
+                Q&A History:
+                {summary}
+            """
+
+_TURN_JSON_RE = re.compile(r'\{.*\}', re.S)
+
+def _parse_turn(text):
+    """Extract the model's ask-or-guess decision, tolerating stray prose.
+
+    Runs on the raw reply — clean_output would delete a fenced ```json
+    block wholesale — and cleans only the extracted fields.
+    """
+    match = _TURN_JSON_RE.search(text)
+    if match:
+        try:
+            data = json.loads(match.group())
+            if data.get("action") == "guess" and data.get("movie"):
+                return "guess", clean_output(str(data["movie"]))
+            if data.get("question"):
+                return "ask", clean_output(str(data["question"]))
+        except (ValueError, TypeError):
+            pass
+    # Fall back to treating the whole reply as the next question.
+    return "ask", clean_output(text)
+
+
 class CineSleuthGUI:
+    _MAX_VISIBLE = 100   # messages kept in the Text widget at once
+    _RESTORE_BATCH = 20  # archived messages re-inserted per scroll-to-top
+
     def __init__(self, root):
         self.root = root
         self.root.title("🎬 CineSleuth - Movie Guessing Game")
@@ -39,12 +113,38 @@ class CineSleuthGUI:
         self.model = None
         self.chat = None
         self.history = []
+        self._summary = ""  # running "Q: ... A: ..." transcript, appended each turn
+        self._stream_tag = "ai"
+        self._stream_buf = []
+        self._stream_entry = []  # full text of the message being streamed
+        self._stream_flush_pending = False
+        self._scroll_pending = False
+        self._archive = []    # every (msg_type, text) ever shown
+        self._msg_lines = []  # widget line counts of the visible messages
+        self._hidden = 0      # archived messages trimmed from the widget
+        self._last_status = None  # last rendered label strings, to skip
+        self._last_qc = None      # no-op Label.config geometry requests
+        self._ui_pending = {}     # coalesced widget updates, applied at idle
         self.question_count = 0
         self.max_questions = 20
         self.game_active = False
-        
+
+        # One long-lived worker runs all model calls off the UI thread and
+        # serializes them, so two overlapping answers can't race on the
+        # shared chat session.
+        self._genai = None
+        self._google_exceptions = None
+
+        self._jobs = queue.Queue()
+        threading.Thread(target=self._worker, daemon=True).start()
+
         self.setup_ui()
         self.initialize_api()
+
+    def _worker(self):
+        while True:
+            job = self._jobs.get()
+            job()
     
     def setup_ui(self):
         # Main container
@@ -109,10 +209,13 @@ class CineSleuthGUI:
             insertbackground=self.fg_color,
             relief=tk.FLAT,
             padx=15,
-            pady=15,
-            state=tk.DISABLED
+            pady=15
         )
         self.chat_display.pack(fill=tk.BOTH, expand=True)
+
+        # Read-only via key interception: blocking user keystrokes avoids
+        # the NORMAL/DISABLED reconfiguration cycle on every insert.
+        self.chat_display.bind("<Key>", lambda e: "break")
         
         # Configure tags for different message types
         self.chat_display.tag_configure("ai", foreground="#00d4ff")
@@ -120,7 +223,13 @@ class CineSleuthGUI:
         self.chat_display.tag_configure("system", foreground="#ffaa00")
         self.chat_display.tag_configure("error", foreground="#ff4444")
         self.chat_display.tag_configure("success", foreground="#00ff00")
-        
+
+        # Scrolling back to the top pulls older archived messages back in.
+        self.chat_display.bind("<Prior>", self._on_scroll_up)
+        self.chat_display.bind("<Button-4>", self._on_scroll_up)
+        self.chat_display.bind("<MouseWheel>", self._on_scroll_up)
+
+
         # Input frame
         input_frame = tk.Frame(main_frame, bg=self.bg_color)
         input_frame.pack(fill=tk.X, pady=(0, 10))
@@ -191,9 +300,17 @@ class CineSleuthGUI:
     
     def initialize_api(self):
         try:
+            # Deferred import: google.generativeai drags in gRPC and
+            # protobuf (100ms+ and tens of MB), so importing here lets
+            # the window paint before the SDK loads.
+            import google.generativeai as genai
+            from google.api_core import exceptions as google_exceptions
+            self._genai = genai
+            self._google_exceptions = google_exceptions
+
             api_key = self.api_key_manager.load_keys()
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel('gemini-2.0-flash')
+            self._genai.configure(api_key=api_key)
+            self.model = self._genai.GenerativeModel('gemini-2.0-flash')
             self.add_message(f"✅ Loaded {len(self.api_key_manager.keys)} API key(s)", "system")
             self.update_status("Ready to play!")
 
@@ -202,29 +319,92 @@ class CineSleuthGUI:
             self.update_status("API Error")
             self.start_btn.config(state=tk.DISABLED)
     
+    _MSG_PREFIX = {
+        "ai": "🤖 AI: ",
+        "user": "👤 You: ",
+        "error": "❌ ",
+        "success": "🎉 ",
+    }
+
     def add_message(self, message, msg_type="system"):
-        self.chat_display.config(state=tk.NORMAL)
-        
-        if msg_type == "ai":
-            prefix = "🤖 AI: "
-        elif msg_type == "user":
-            prefix = "👤 You: "
-        elif msg_type == "error":
-            prefix = "❌ "
-        elif msg_type == "success":
-            prefix = "🎉 "
-        else:
-            prefix = "ℹ️ "
-        
-        self.chat_display.insert(tk.END, prefix + message + "\n\n", msg_type)
+        prefix = self._MSG_PREFIX.get(msg_type, "ℹ️ ")
+
+        entry = prefix + message + "\n\n"
+        self._archive.append((msg_type, entry))
+        self.chat_display.insert(tk.END, entry, msg_type)
+        self._msg_lines.append(entry.count("\n"))
+        self._trim_overflow()
+        self._schedule_scroll()
+
+    def _trim_overflow(self):
+        # Keep the widget window bounded so Tk re-layout stays O(window);
+        # trimmed messages remain in _archive and return on scroll-to-top.
+        if len(self._msg_lines) > self._MAX_VISIBLE:
+            trimmed = self._msg_lines.pop(0)
+            self.chat_display.delete("1.0", f"{trimmed + 1}.0")
+            self._hidden += 1
+
+    def _on_scroll_up(self, event=None):
+        if self._hidden and self.chat_display.yview()[0] <= 0.0:
+            self._restore_archived()
+
+    def _restore_archived(self):
+        batch = self._archive[max(self._hidden - self._RESTORE_BATCH, 0):self._hidden]
+        if not batch:
+            return
+        line = 1
+        counts = []
+        for msg_type, entry in batch:
+            self.chat_display.insert(f"{line}.0", entry, msg_type)
+            n = entry.count("\n")
+            counts.append(n)
+            line += n
+        self._msg_lines[:0] = counts
+        self._hidden -= len(batch)
+
+    def _schedule_scroll(self):
+        # see(tk.END) forces a full scroll-region recompute, so coalesce
+        # rapid inserts into one scroll per ~frame via a dirty flag.
+        if not self._scroll_pending:
+            self._scroll_pending = True
+            self.root.after(30, self._flush_scroll)
+
+    def _flush_scroll(self):
+        self._scroll_pending = False
         self.chat_display.see(tk.END)
-        self.chat_display.config(state=tk.DISABLED)
-    
+
     def update_status(self, status):
-        self.status_label.config(text=f"Status: {status}")
-    
+        text = f"Status: {status}"
+        if text != self._last_status:
+            self.status_label.config(text=text)
+            self._last_status = text
+
     def update_question_count(self):
-        self.question_label.config(text=f"Questions: {self.question_count}/{self.max_questions}")
+        text = f"Questions: {self.question_count}/{self.max_questions}"
+        if text != self._last_qc:
+            self.question_label.config(text=text)
+            self._last_qc = text
+
+    def schedule_ui(self, **kwargs):
+        # Back-to-back status/label/input-state changes are coalesced into
+        # one idle-time pass through Tk instead of one event-loop pass each.
+        first = not self._ui_pending
+        self._ui_pending.update(kwargs)
+        if first:
+            self.root.after_idle(self._apply_ui)
+
+    def _apply_ui(self):
+        pending, self._ui_pending = self._ui_pending, {}
+        if "status" in pending:
+            self.update_status(pending["status"])
+        if pending.get("question_count"):
+            self.update_question_count()
+        if "entry_state" in pending:
+            self.answer_entry.config(state=pending["entry_state"])
+        if "send_state" in pending:
+            self.send_btn.config(state=pending["send_state"])
+        if pending.get("focus_entry"):
+            self.answer_entry.focus()
     
     def start_game(self):
         self.reset_game()
@@ -238,19 +418,21 @@ class CineSleuthGUI:
         
         self.add_message("Think of a movie and I'll try to guess it in 20 questions!", "system")
         self.update_status("Game in progress...")
-        
+
         # Ask first question
-        self.ask_question()
+        self.request_turn()
     
     def reset_game(self):
         self.history = []
+        self._summary = ""
         self.question_count = 0
         self.game_active = False
         self.chat = None
         
-        self.chat_display.config(state=tk.NORMAL)
         self.chat_display.delete(1.0, tk.END)
-        self.chat_display.config(state=tk.DISABLED)
+        self._archive = []
+        self._msg_lines = []
+        self._hidden = 0
         
         self.start_btn.config(state=tk.NORMAL)
         self.answer_entry.config(state=tk.DISABLED)
@@ -262,122 +444,96 @@ class CineSleuthGUI:
         
         self.add_message("Welcome to CineSleuth! Click 'Start Game' to begin.", "system")
     
-    def ask_question(self):
+    def _send_streaming(self, prompt):
+        return "".join(chunk.text
+                       for chunk in self.chat.send_message(prompt, stream=True))
+
+    def request_turn(self):
         if not self.game_active:
             return
-        
-        self.question_count += 1
-        self.update_question_count()
-        self.update_status("AI is thinking...")
-        self.answer_entry.config(state=tk.DISABLED)
-        self.send_btn.config(state=tk.DISABLED)
-        
-        # Run in thread to avoid freezing UI
-        threading.Thread(target=self._ask_question_thread, daemon=True).start()
-    
-    def _ask_question_thread(self):
+
+        self.schedule_ui(status="AI is thinking...",
+                         entry_state=tk.DISABLED, send_state=tk.DISABLED)
+
+        # Hand off to the worker to avoid freezing the UI
+        self._jobs.put(self._turn_thread)
+
+    def _turn_thread(self):
         try:
-            summary = "\n".join([f"Q: {q} A: {a}" for q, a in self.history])
+            summary = self._summary
+            remaining = self.max_questions - self.question_count
+            prompt = (_TURN_PROMPT_HEAD + (summary if summary else 'None')
+                      + _TURN_PROMPT_TAIL.format(remaining=remaining))
 
-            prompt = f"""
-                        You are a movie-detective AI playing a guessing game. 
-                        The user is thinking of a movie.
-                        Previous Q&A so far:
-                        {summary if summary else 'None'}, and you have only 20 questions in total. 
-                        You have {self.max_questions - self.question_count + 1} questions remaining. 
-                        You must guess the movie within these questions.
-                        Mostly focus the last Q&A in history to narrow down.
+            # Stream the response so decoding overlaps the network read;
+            # the JSON envelope is only parsed once the stream completes.
+            # Key rotation retries only the send - the prompt built above
+            # is reused as-is, and the stack stays flat.
+            while True:
+                try:
+                    action, value = cached_turn(history_cache_key(self.history), prompt,
+                                                self._send_streaming, _parse_turn,
+                                                kind='GT')
+                    break
+                except self._google_exceptions.ResourceExhausted:
+                    if not self.api_key_manager.has_more_keys():
+                        self.root.after(0, lambda: self.add_message("API quota exceeded on all keys!", "error"))
+                        self.root.after(0, self.end_game)
+                        return
+                    self._genai.configure(api_key=self.api_key_manager.mark_current_exhausted())
+                    # The model caches its client on first use; drop it so
+                    # the retry actually sends with the backup key instead
+                    # of the one that just 429'd.
+                    self.model._client = None
+                    self.model._async_client = None
+                    self.root.after(0, lambda: self.add_message("🔄 Switched to backup API key", "system"))
 
-                        Ask ONE question to narrow down the movie about its 
-                            genre, 
-                            Time Period / Release Year, 
-                            actors
-                            actresses, 
-                            director,
-                            whether Franchise vs Standalone,
-                            Setting,
-                            Main Character whether male or female lead,
-                            Plot elements,
-                            Famous scenes,
-                            themes & Tone,
-                            Cinematography style,
-                            Popularity
-                            and plots etc. Output only the question.
-                    """
-            
-            response = self.chat.send_message(prompt)
-            question = clean_output(response.text)
-            
             # Update UI in main thread
-            self.root.after(0, lambda: self._display_question(question))
-            
-        except google_exceptions.ResourceExhausted:
-            if self.api_key_manager.has_more_keys():
-                new_key = self.api_key_manager.mark_current_exhausted()
-                genai.configure(api_key=new_key)
-                self.root.after(0, lambda: self.add_message("🔄 Switched to backup API key", "system"))
-                self._ask_question_thread()
+            if action == "guess":
+                self.root.after(0, lambda: self._show_guess(value))
+            elif self.question_count >= self.max_questions:
+                self.root.after(0, self._game_over_no_guess)
             else:
-                self.root.after(0, lambda: self.add_message("API quota exceeded on all keys!", "error"))
-                self.root.after(0, self.end_game)
+                self.root.after(0, lambda: self._display_question(value))
+
         except Exception as e:
             self.root.after(0, lambda: self.add_message(f"Error: {e}", "error"))
             self.root.after(0, self.end_game)
-    
+
     def _display_question(self, question):
+        self.question_count += 1
         self.current_question = question
         self.add_message(f"Question {self.question_count}: {question}", "ai")
-        self.update_status("Waiting for your answer...")
-        self.answer_entry.config(state=tk.NORMAL)
-        self.send_btn.config(state=tk.NORMAL)
-        self.answer_entry.focus()
-    
+        self.schedule_ui(status="Waiting for your answer...",
+                         question_count=True,
+                         entry_state=tk.NORMAL, send_state=tk.NORMAL,
+                         focus_entry=True)
+
     def submit_answer(self):
         answer = self.answer_entry.get().strip()
         if not answer:
             return
-        
+
         self.answer_entry.delete(0, tk.END)
         self.answer_question(answer)
-    
+
+    def _record_qa(self, question, answer):
+        self.history.append((question, answer))
+        self._summary = ((self._summary + "\n" if self._summary else "")
+                         + f"Q: {question} A: {answer}")
+
     def answer_question(self, answer):
         if not self.game_active:
             return
-        
+
         self.add_message(answer, "user")
-        self.history.append((self.current_question, answer))
-        
-        self.answer_entry.config(state=tk.DISABLED)
-        self.send_btn.config(state=tk.DISABLED)
-        self.update_status("AI is analyzing...")
-        
-        # Check for guess
-        threading.Thread(target=lambda: self._try_guess(answer), daemon=True).start()
-    
-    def _try_guess(self, last_answer):
-        try:
-            summary = "\n".join([f"Q: {q} A: {a}" for q, a in self.history])
-    
-            guess_prompt = f"""
-                                Based on the following Q&A:
-                                {summary if summary else 'None'}. Guess the movie the user is thinking of based on the provided information. 
-                                Mostly focus on the last Q&A in history to narrow down and guess the movie.
-                                If not confident, say 'I need more questions'. Output only the movie title or the phrase.
-                            """
-            
-            guess_resp = self.chat.send_message(guess_prompt)
-            guess = clean_output(guess_resp.text)
-            
-            if "need more questions" not in guess.lower():
-                self.root.after(0, lambda: self._show_guess(guess))
-            else:
-                if self.question_count >= self.max_questions:
-                    self.root.after(0, self._game_over_no_guess)
-                else:
-                    self.root.after(0, self.ask_question)
-                    
-        except Exception as e:
-            self.root.after(0, lambda: self.add_message(f"Error: {e}", "error"))
+        self._record_qa(self.current_question, answer)
+
+        self.schedule_ui(status="AI is analyzing...")
+
+        # The combined call both evaluates a guess and asks the next
+        # question, so the answer hands straight back to the model.
+        self.request_turn()
     
     def _show_guess(self, guess):
         self.add_message(f"I think your movie is: {guess}", "ai")
@@ -393,10 +549,13 @@ class CineSleuthGUI:
             self.end_game()
         else:
             self.add_message("🤔 Hmm, let me ask more questions...", "system")
+            # Record the miss so the model doesn't guess it again and the
+            # response cache key moves on.
+            self._record_qa(f"Is it {guess}?", "no")
             if self.question_count >= self.max_questions:
                 self._game_over_no_guess()
             else:
-                self.ask_question()
+                self.request_turn()
     
     def _game_over_no_guess(self):
         self.add_message("😅 I couldn't guess your movie. You win!", "system")
@@ -408,33 +567,69 @@ class CineSleuthGUI:
             
             # Get AI explanation
             self.update_status("AI is explaining...")
-            threading.Thread(target=lambda: self._get_explanation(movie), daemon=True).start()
+            self._jobs.put(lambda: self._get_explanation(movie))
         else:
             self.end_game()
     
     def _get_explanation(self, movie):
         """Get AI explanation for why it couldn't guess the movie"""
         try:
-            summary = "\n".join([f"Q: {q} A: {a}" for q, a in self.history])
-            prompt = f"""
-                The Movie is {movie}. Explain why you could not guess it based on the Q&A history.
-                If the user's answers don't match the actual movie details, point that out politely.
-                Keep your response brief (2-3 sentences).
-                Q&A History:
-                {summary}
-            """
-            
-            response = self.chat.send_message(prompt)
-            explanation = clean_output(response.text)
+            prompt = _EXPLAIN_PROMPT_TMPL.format(movie=movie,
+                                                  summary=self._summary)
             
+            # Stream the explanation into the chat display as it is
+            # generated instead of waiting for the full response.
+            self.root.after(0, self._begin_stream, "ai")
+            pieces = []
+            for chunk in self.chat.send_message(prompt, stream=True):
+                pieces.append(chunk.text)
+                self.root.after(0, self._append_stream, chunk.text)
+            self.root.after(0, self._end_stream)
+            explanation = clean_output("".join(pieces))
+
             self.root.after(0, lambda: self._show_explanation(movie, explanation))
-            
+
         except Exception as e:
             self.root.after(0, lambda: self.add_message(f"Could not get explanation: {e}", "error"))
             self.root.after(0, self.end_game)
-    
+
+    def _begin_stream(self, msg_type):
+        self._stream_tag = msg_type
+        self._stream_buf = []
+        self._stream_entry = ["🤖 "]
+        self.chat_display.insert(tk.END, "🤖 ", msg_type)
+
+    def _append_stream(self, text):
+        # Coalesce rapid chunks into one widget update per ~frame so 100
+        # tiny chunks don't trigger 100 redraws.
+        self._stream_buf.append(text)
+        if not self._stream_flush_pending:
+            self._stream_flush_pending = True
+            self.root.after(30, self._flush_stream)
+
+    def _flush_stream(self):
+        self._stream_flush_pending = False
+        if not self._stream_buf:
+            return
+        text, self._stream_buf = "".join(self._stream_buf), []
+        self._stream_entry.append(text)
+        self.chat_display.insert(tk.END, text, self._stream_tag)
+        self._schedule_scroll()
+
+    def _end_stream(self):
+        self._flush_stream()
+        self.chat_display.insert(tk.END, "\n\n", self._stream_tag)
+        # Record the streamed message in the same bookkeeping add_message
+        # uses, so trim and restore offsets keep describing the widget.
+        entry = "".join(self._stream_entry) + "\n\n"
+        self._stream_entry = []
+        self._archive.append((self._stream_tag, entry))
+        self._msg_lines.append(entry.count("\n"))
+        self._trim_overflow()
+        self._schedule_scroll()
+
     def _show_explanation(self, movie, explanation):
-        self.add_message(f"🤖 {explanation}", "ai")
+        # Already rendered by the streaming appender; just record and wrap up.
         self.history.append(("Final Movie", movie))
         self.history.append(("AI Explanation", explanation))
         self.save_history(movie, won=False, explanation=explanation)
@@ -485,29 +680,31 @@ class CineSleuthGUI:
     
     def save_history(self, movie, won, explanation=None):
         try:
-            log_dir = os.path.join(os.path.dirname(__file__), "logs")
-            os.makedirs(log_dir, exist_ok=True)
-            
-            with open(os.path.join(log_dir, "log.txt"), 'a', encoding='utf-8') as f:
-                now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                f.write(f"\n{'='*50}\n")
-                f.write(f"Date: {now}\n")
-                f.write(f"Movie: {movie}\n")
-                f.write(f"Result: {'AI Won' if won else 'Player Won'}\n")
-                f.write(f"Questions Asked: {self.question_count}\n")
-                f.write("-" * 30 + "\n")
-                for q, a in self.history:
-                    f.write(f"Q: {q}\nA: {a}\n\n")
+            os.makedirs(_LOG_DIR, exist_ok=True)
+
+            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            parts = [
+                f"\n{'='*50}\n",
+                f"Date: {now}\n",
+                f"Movie: {movie}\n",
+                f"Result: {'AI Won' if won else 'Player Won'}\n",
+                f"Questions Asked: {self.question_count}\n",
+                "-" * 30 + "\n",
+            ]
+            parts.extend(f"Q: {q}\nA: {a}\n\n" for q, a in self.history)
+
+            # One write per game instead of one per line.
+            with open(_LOG_PATH, 'a', encoding='utf-8') as f:
+                f.write(''.join(parts))
 
         except Exception as e:
             print(f"Failed to save history: {e}")
     
     def end_game(self):
         self.game_active = False
-        self.answer_entry.config(state=tk.DISABLED)
-        self.send_btn.config(state=tk.DISABLED)
+        self.schedule_ui(status="Game ended",
+                         entry_state=tk.DISABLED, send_state=tk.DISABLED)
         self.start_btn.config(state=tk.NORMAL)
-        self.update_status("Game ended")
         self.add_message("Click 'Start Game' to play again!", "system")
 
 def main():
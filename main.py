@@ -1,10 +1,29 @@
 import os
 import re
+import json
+import time
+import atexit
+import random
+import hashlib
+from types import SimpleNamespace
 from dotenv import load_dotenv
-import google.generativeai as genai
 from google.api_core import exceptions as google_exceptions
 from datetime import datetime
 
+# google.generativeai drags in gRPC and protobuf — hundreds of ms of
+# import time and tens of MB of RSS — so it is resolved on first API
+# use instead of at module import. The None placeholder keeps the
+# attribute patchable (tests replace main.genai), and _ensure_genai
+# respects any non-None replacement.
+genai = None
+
+def _ensure_genai():
+    global genai
+    if genai is None:
+        import google.generativeai as _genai
+        genai = _genai
+    return genai
+
 class CineSleuthError(Exception):
     pass
 class APIKeyError(CineSleuthError):
@@ -16,29 +35,64 @@ class APIQuotaError(CineSleuthError):
 class AllKeysExhaustedError(CineSleuthError):
     pass
 
+# load_dotenv re-reads and re-parses the .env file every call; one parse
+# per process is enough, the values live in os.environ afterwards.
+_dotenv_loaded = False
+
+def _load_dotenv_once():
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        load_dotenv()
+        _dotenv_loaded = True
+
+
+# Session artifacts (game log, response cache) live next to the module
+# instead of a hardcoded absolute path.
+_LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
+LOG_PATH = os.path.join(_LOG_DIR, "log.txt")
+
+# Matches the primary key and any numbered backup (GEMINI_API_KEY_2...).
+_KEY_RE = re.compile(r'^GEMINI_API_KEY(_\d+)?$')
+
+# How long a quota-limited key sits out before rotation may reuse it.
+# Gemini free-tier quotas are per-minute, so a key that 429'd is worth
+# trying again once its window has rolled over.
+_QUOTA_COOLDOWN_SECS = 60.0
+
 # Global API key manager
-class APIKeyManager:  
+class APIKeyManager:
     def __init__(self):
         self.keys = []
+        self.key_count = 0
         self.current_index = 0
         self.exhausted_keys = set()
-    
+        # Per-key health: quota hits put a key on a timed cooldown and
+        # rotation wraps around to it once the window passes; a key that
+        # fails auth is marked unhealthy and never retried.
+        self.key_state = {}
+
     def load_keys(self):
-        load_dotenv()
-        No_of_keys = int(os.getenv("NO_of_keys", 1))
-        primary_key = os.getenv("GEMINI_API_KEY")
-        if primary_key:
-            self.keys.append(("GEMINI_API_KEY", primary_key))
-        
-        # Load backup keys (GEMINI_API_KEY_2, GEMINI_API_KEY_3, etc.)
-        for i in range(2, No_of_keys + 1):
-            key = os.getenv(f"GEMINI_API_KEY_{i}")
-            if key:
-                self.keys.append((f"GEMINI_API_KEY_{i}", key))
-        
+        _load_dotenv_once()
+        # Start from a clean slate so repeated loads (GUI reset, tests)
+        # re-read the environment instead of accumulating stale keys.
+        self.current_index = 0
+        self.exhausted_keys.clear()
+        self.key_state.clear()
+        # One scan over the environment instead of a counted getenv loop,
+        # so backup keys need no NO_of_keys bookkeeping. The primary key
+        # sorts first, then the numbered backups.
+        self.keys = sorted(
+            ((name, value) for name, value in os.environ.items()
+             if _KEY_RE.match(name) and value),
+            key=lambda kv: (kv[0] != "GEMINI_API_KEY", kv[0]))
+        self.key_count = len(self.keys)
+
         if not self.keys:
             raise APIKeyError("No API keys found. Please set GEMINI_API_KEY in your .env file.")
-        
+
+        for key_name, _ in self.keys:
+            self.key_state[key_name] = {'cooldown_until': 0.0, 'healthy': True}
+
         print(f"🔑 Loaded {len(self.keys)} API key(s)")
         return self.get_current_key()
     
@@ -52,52 +106,123 @@ class APIKeyManager:
             return None
         return self.keys[self.current_index][0]
     
+    def _usable(self, key_name, now):
+        state = self.key_state.get(key_name)
+        if state is None:
+            return True
+        return state['healthy'] and state['cooldown_until'] <= now
+
     def mark_current_exhausted(self):
         if self.current_index < len(self.keys):
             key_name = self.keys[self.current_index][0]
             self.exhausted_keys.add(key_name)
+            if key_name in self.key_state:
+                self.key_state[key_name]['cooldown_until'] = (
+                    time.monotonic() + _QUOTA_COOLDOWN_SECS)
             print(f"⚠️ API key '{key_name}' quota exceeded.")
-        
-        self.current_index += 1
-        
+
+        # Rotate to the next usable key, wrapping around so a key whose
+        # cooldown has expired gets back into service.
+        now = time.monotonic()
+        for offset in range(1, self.key_count + 1):
+            idx = (self.current_index + offset) % self.key_count
+            key_name, key = self.keys[idx]
+            if self._usable(key_name, now):
+                self.current_index = idx
+                print(f"🔄 Switching to backup key: {key_name}")
+                return key
+        raise AllKeysExhaustedError("All API keys have been exhausted. Please add more keys or wait for quota reset.")
+
+    def mark_current_unhealthy(self):
         if self.current_index < len(self.keys):
-            new_key_name = self.keys[self.current_index][0]
-            print(f"🔄 Switching to backup key: {new_key_name}")
-            return self.get_current_key()
-        else:
-            raise AllKeysExhaustedError("All API keys have been exhausted. Please add more keys or wait for quota reset.")
-    
+            key_name = self.keys[self.current_index][0]
+            if key_name in self.key_state:
+                self.key_state[key_name]['healthy'] = False
+
     def has_more_keys(self):
-        return self.current_index < len(self.keys) - 1
-    
+        now = time.monotonic()
+        return any(self._usable(key_name, now)
+                   for idx, (key_name, _) in enumerate(self.keys)
+                   if idx != self.current_index)
+
     def reset(self):
         self.current_index = 0
         self.exhausted_keys.clear()
+        for state in self.key_state.values():
+            state['cooldown_until'] = 0.0
+            state['healthy'] = True
 
 
 # Global instance
 api_key_manager = APIKeyManager()
 
+# The third-party 'regex' engine avoids pathological backtracking on
+# markdown-dense responses; it is a drop-in for these patterns, so use
+# it when available and fall back to the stdlib engine otherwise.
+try:
+    import regex as _re_engine
+except ImportError:
+    _re_engine = re
+
+# All markdown-stripping patterns fused into one alternation, compiled once
+# at import, so clean_output makes a single pass over each model response
+# instead of one pass per pattern.
+_MD_RE = _re_engine.compile(
+    r'\*\*(?P<bold>.+?)\*\*'
+    r'|\*(?P<italic>.+?)\*'
+    r'|__(?P<bold_u>.+?)__'
+    r'|_(?P<italic_u>.+?)_'
+    r'|```[\s\S]*?```'
+    r'|`(?P<code>.+?)`'
+    r'|^#{1,6}\s*',
+    re.MULTILINE,
+)
+_NEWLINES_RE = _re_engine.compile(r'\n{3,}')
+
+# Characters that can start any markdown construct we strip.
+_MD_CHARS = frozenset('*_`#')
+
+# Deletes emphasis markers in one C-speed pass for replies that use
+# nothing fancier than bold/italic.
+_STRIP_TABLE = str.maketrans('', '', '*_')
+
+def _md_repl(match):
+    # Emphasis and inline code keep their inner text; code blocks and
+    # heading markers (no group matched) are dropped entirely.
+    return (match.group('bold') or match.group('italic')
+            or match.group('bold_u') or match.group('italic_u')
+            or match.group('code') or '')
+
 def clean_output(text):
     if not isinstance(text, str):
         raise TypeError("Input must be a string")
-    text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)
-    text = re.sub(r'\*(.+?)\*', r'\1', text)
-    text = re.sub(r'__(.+?)__', r'\1', text)
-    text = re.sub(r'_(.+?)_', r'\1', text)
-    text = re.sub(r'```[\s\S]*?```', '', text)
-    text = re.sub(r'`(.+?)`', r'\1', text)
-    text = re.sub(r'^#{1,6}\s*', '', text, flags=re.MULTILINE)
-    text = re.sub(r'\n{3,}', '\n\n', text)
+    # Most responses are plain questions with no markdown at all; one
+    # linear membership scan beats running the substitutions on them.
+    if _MD_CHARS.isdisjoint(text) and '\n\n\n' not in text:
+        return text.strip()
+    # Emphasis-only markdown (no code or headers, balanced markers) can
+    # drop its markers with a single str.translate pass; anything else
+    # goes through the full regex. Odd marker counts fall through too,
+    # since translate would eat a literal asterisk or underscore.
+    if ('`' not in text and '#' not in text
+            and text.count('*') % 2 == 0 and text.count('_') % 2 == 0):
+        text = text.translate(_STRIP_TABLE)
+    else:
+        text = _MD_RE.sub(_md_repl, text)
+    if '\n\n\n' in text:
+        text = _NEWLINES_RE.sub('\n\n', text)
     return text.strip()
 
+_VALID_ANSWERS = frozenset(('yes', 'no', 'exit'))
+_INVALID_ANSWER_MSG = "Please answer 'yes', 'no', or 'exit'."
+
 def get_yes_no_input(prompt="Please answer 'yes' or 'no' (or type 'exit' to quit): "):
     while True:
         try:
             answer = input(prompt).strip().lower()
-            if answer in ['yes', 'no', 'exit']:
+            if answer in _VALID_ANSWERS:
                 return answer
-            print("Please answer 'yes', 'no', or 'exit'.")
+            print(_INVALID_ANSWER_MSG)
         except EOFError:
             return 'exit'
         except KeyboardInterrupt:
@@ -109,7 +234,7 @@ def load_api_key():
 
 def configure_api(api_key):
     try:
-        genai.configure(api_key=api_key)
+        _ensure_genai().configure(api_key=api_key)
     except Exception as e:
         raise APIConnectionError(f"Failed to configure API: {e}")
 
@@ -120,35 +245,101 @@ def reconfigure_with_next_key():
 
 def create_model(model_name='gemini-2.0-flash'):
     try:
-        return genai.GenerativeModel(model_name)
+        return _ensure_genai().GenerativeModel(model_name)
     except Exception as e:
         raise APIConnectionError(f"Failed to create model '{model_name}': {e}")
 
-def send_message_safely(chat, prompt, model=None):
-    max_retries = len(api_key_manager.keys)
-    
+# Optional cross-run response cache, keyed by a sha256 of the prompt
+# and persisted under logs/. Off by default so live games always hit
+# the model; set CINESLEUTH_CACHE=readwrite during development or
+# replays to short-circuit repeated prompts entirely.
+_PROMPT_CACHE_FILE = os.path.join(_LOG_DIR, "response_cache.json")
+_prompt_cache = None
+
+def _prompt_cache_enabled():
+    return os.getenv("CINESLEUTH_CACHE", "off").strip().lower() == "readwrite"
+
+def _get_prompt_cache():
+    global _prompt_cache
+    if _prompt_cache is None:
+        try:
+            with open(_PROMPT_CACHE_FILE, "r", encoding="utf-8") as f:
+                _prompt_cache = json.load(f)
+        except (OSError, ValueError):
+            _prompt_cache = {}
+        atexit.register(_save_prompt_cache)
+    return _prompt_cache
+
+def _save_prompt_cache():
+    if not _prompt_cache:
+        return
+    try:
+        os.makedirs(os.path.dirname(_PROMPT_CACHE_FILE), exist_ok=True)
+        with open(_PROMPT_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(_prompt_cache, f)
+    except OSError:
+        pass
+
+def _prompt_digest(prompt):
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+# Bound once at import so the except clauses below resolve to the real
+# exception classes without a double attribute lookup per attempt.
+_ResourceExhausted = google_exceptions.ResourceExhausted
+_InvalidArgument = google_exceptions.InvalidArgument
+_PermissionDenied = google_exceptions.PermissionDenied
+_ServiceUnavailable = google_exceptions.ServiceUnavailable
+
+def send_message_safely(chat, prompt, model=None, stream=False):
+    if not stream and _prompt_cache_enabled():
+        cached = _get_prompt_cache().get(_prompt_digest(prompt))
+        if cached is not None:
+            return SimpleNamespace(text=cached)
+
+    # Always make at least one attempt, even if no keys were loaded
+    # through the manager (e.g. a failed load left the list empty).
+    max_retries = max(api_key_manager.key_count, 1)
+
     for attempt in range(max_retries):
         try:
+            if stream:
+                # Streaming responses have no .text until consumed, so
+                # they bypass the prompt cache.
+                return chat.send_message(prompt, stream=True)
             response = chat.send_message(prompt)
+            if _prompt_cache_enabled():
+                _get_prompt_cache()[_prompt_digest(prompt)] = response.text
             return response
-        except google_exceptions.ResourceExhausted:
-            if api_key_manager.has_more_keys():
-                try:
-                    reconfigure_with_next_key()
-                    if model:
-                        new_model = create_model(model.model_name if hasattr(model, 'model_name') else 'gemini-2.0-flash')
-                        new_chat = new_model.start_chat(history=chat.history)
-                        return send_message_safely(new_chat, prompt, new_model)
-                    continue
-                except AllKeysExhaustedError:
-                    raise APIQuotaError("All API keys exhausted. Please add more keys to your .env file or wait for quota reset.")
-            else:
+        except _ResourceExhausted:
+            if not api_key_manager.has_more_keys():
                 raise APIQuotaError("API quota exceeded on all keys. Please add more keys or wait for quota reset.")
-        except google_exceptions.InvalidArgument as e:
+            # Burst rate limits often clear within seconds; a jittered
+            # exponential pause before switching keeps one spike from
+            # 429-ing its way through the whole pool.
+            time.sleep(random.uniform(0, min(2 ** attempt, 30)))
+            try:
+                reconfigure_with_next_key()
+            except AllKeysExhaustedError:
+                raise APIQuotaError("All API keys exhausted. Please add more keys to your .env file or wait for quota reset.")
+            # The SDK caches a client on the model after its first call,
+            # built from the credentials configured at that time. Drop
+            # the cached client so the next send binds to the newly
+            # configured key; the model and chat objects (and the chat
+            # history) are reused untouched. Callers rarely pass model,
+            # so fall back to the chat's own model reference.
+            stale = model if model is not None else getattr(chat, 'model', None)
+            if stale is not None:
+                stale._client = None
+                stale._async_client = None
+        except _InvalidArgument as e:
             raise CineSleuthError(f"Invalid request: {e}")
-        except google_exceptions.PermissionDenied:
+        except _PermissionDenied:
+            # Auth failures are permanent for this key; quarantine it so
+            # rotation never cycles back to it.
+            api_key_manager.mark_current_unhealthy()
             raise APIKeyError("Invalid API key or permission denied.")
-        except google_exceptions.ServiceUnavailable:
+        except _ServiceUnavailable:
             raise APIConnectionError("Gemini API service is currently unavailable. Please try again later.")
         except Exception as e:
             raise APIConnectionError(f"API error: {e}")
@@ -156,54 +347,40 @@ def send_message_safely(chat, prompt, model=None):
     raise APIQuotaError("All API keys exhausted after retries.")
 
 
-def print_banner():
-    print("+" + "-"*68 + "+")
-    print("|" + " "*23 + "Welcome to Cine-Sleuth!" + " "*22 + "|")
-    print("|" + " "*20 + "Your AI-powered movie detector" + " "*18 + "|")
-    print("+" + "-"*68 + "+")
-    print("""\nI will ask up to 20 questions to guess 🙃 the movie you're thinking of🎯.
-      """)
-
-def write_history(movie, history):
-    with open("G:/Projects/CineSleuth/logs/log.txt",'a') as f:
-        summary = "\n".join([f"Q: {q} A: {a}" for q, a in history])
-        f.write(f"{movie} => \n{summary}")
-
-def writeDate():
-    with open("G:/Projects/CineSleuth/logs/log.txt",'a') as f:
-        now = datetime.now()
-        formatted = now.strftime("%Y-%m-%d %H:%M:%S")
-        f.write(f"Date and Time: {formatted}\n")
+# In-memory cache of cleaned model responses, keyed by prompt kind
+# ('T' = combined question+guess turn) plus the Q&A history that
+# produced the prompt. Replaying a game with the same answers (or resetting and
+# re-answering in the GUI) hits memory instead of the Gemini API.
+_RESP_CACHE = {}
 
-def main():
-    try:
-        api_key = load_api_key()
-        configure_api(api_key)
-        print_banner()
+# Answers like 'y', 'yeah' and 'yep' mean the same thing as 'yes' but
+# would produce distinct cache keys. Normalize them when keying so
+# equivalent sessions converge; the original wording is still shown
+# on screen and written to the log.
+_ANSWER_ALIASES = {"y": "yes", "yeah": "yes", "yep": "yes",
+                   "n": "no", "nope": "no"}
 
-        user_input = input("Type 'start' to begin or 'exit' to quit: ").strip().lower()
-        if user_input == 'exit':
-            print("👋 Goodbye!")
-            return
+def _norm_answer(answer):
+    answer = answer.strip().lower()
+    return _ANSWER_ALIASES.get(answer, answer)
 
-        model = create_model('gemini-2.0-flash')
-        history = []  
+def history_cache_key(history):
+    return tuple((q, _norm_answer(a)) for q, a in history)
 
-        max_questions = 20
-        chat = model.start_chat(history=[])
-        writeDate()
-        for i in range(1, max_questions + 1):
-            summary = "\n".join([f"Q: {q} A: {a}" for q, a in history])
-            
-            prompt = f"""
+# The per-turn prompt interpolates only the running summary; keep the
+# constant halves as module-level literals instead of rebuilding the
+# whole template through an f-string every iteration.
+_TURN_PROMPT_HEAD = """
                         You are a movie-detective AI playing a guessing game. 
                         The user is thinking of a movie.
                         Previous Q&A so far:
-                        {summary if summary else 'None'}, and you have only 20 questions in total. You must guess the movie within these questions.
+                        """
+_TURN_PROMPT_TAIL = """, and you have only 20 questions in total. You must guess the movie within these questions.
                         Mostly focus the last Q&A in history to narrow down.
 
-                        Ask ONE question to narrow down the movie about its 
-                            genre, 
+                        Respond ONLY with a JSON object with two keys, "question" and "guess".
+                        "question" is ONE question to narrow down the movie about its
+                            genre,
                             Time Period / Release Year, 
                             actors
                             actresses, 
@@ -216,56 +393,160 @@ def main():
                             themes & Tone,
                             Cinematography style,
                             Popularity
-                            and plots etc. Output only the question.
+                            and plots etc.
+                        "guess" is the movie title if you are already confident from the Q&A so far,
+                        otherwise exactly the phrase "I need more questions".
                     """
-            
-            response = send_message_safely(chat, prompt)
-            question = clean_output(response.text)
-            print(f"\nAI Question {i}: {question}")
-            
-            answer = input("Your Answer (yes/no or type 'exit' to quit): ").strip().lower()
-            if answer == 'exit':
-                print("Thanks for playing!")
-                break
-
-            history.append((question, answer))
-            
-            guess_prompt = f"""
-                                Based on the following Q&A:
-                                {summary if summary else 'None'}. Guess the movie the user is thinking of based on the provided information. 
-                                Mostly focus on the last Q&A in history to narrow down and guess the movie.
-                                If not confident, say 'I need more questions'. Output only the movie title or the phrase.
-                            """
-            
-            guess_resp = send_message_safely(chat, guess_prompt)
-            guess = clean_output(guess_resp.text)
-            
-            if "need more questions" not in guess.lower():
-                print("\nI think your movie:", guess)
-                confirm = get_yes_no_input("\nIs this correct? (yes/no): ")
-                if confirm == 'yes':
-                    print("🎉 I guessed it! Thanks for playing!")
-                    print("👋Bye .... Thanks for playing!")
-                    history.append(("Final Guess", guess))
-                    write_history(guess, history)
-                    break           
-                    
-                else:
+
+
+# Each game turn used to cost two round trips: one for the next
+# question and one for the guess. A single prompt asking for a JSON
+# object with both halves the API calls (and quota draw) per turn.
+_TURN_JSON_RE = re.compile(r'\{.*\}', re.S)
+
+def parse_turn(text):
+    """Extract the (question, guess) pair from a combined turn reply."""
+    match = _TURN_JSON_RE.search(text)
+    if match:
+        try:
+            data = json.loads(match.group(0))
+            # A missing guess means the model isn't guessing yet; treat
+            # it like the explicit phrase so the CLI never announces an
+            # empty "confident" guess.
+            return (clean_output(str(data.get('question') or '')),
+                    clean_output(str(data.get('guess') or ''))
+                    or "I need more questions")
+        except json.JSONDecodeError:
+            pass
+    # Malformed reply: treat the whole thing as a question and play on.
+    return clean_output(text), "I need more questions"
+
+def cached_turn(history_key, prompt, send_fn, parse_fn=parse_turn, kind='T'):
+    """Send (or replay) a turn prompt, parsing the raw reply once.
+
+    The raw model text is parsed before any markdown cleanup so fenced
+    ```json replies survive; parse_fn cleans the extracted fields.
+    Callers with a different reply schema (the GUI) must pass their own
+    kind so their parsed tuples never collide with the CLI's.
+    """
+    key = (kind, history_key)
+    cached = _RESP_CACHE.get(key)
+    if cached is not None:
+        return cached
+    turn = parse_fn(send_fn(prompt))
+    _RESP_CACHE[key] = turn
+    return turn
+
+
+# Assembled once at import; print_banner then makes a single write
+# instead of five prints that each take the stdout lock and flush.
+_BANNER = (
+    "+" + "-"*68 + "+\n"
+    "|" + " "*23 + "Welcome to Cine-Sleuth!" + " "*22 + "|\n"
+    "|" + " "*20 + "Your AI-powered movie detector" + " "*18 + "|\n"
+    "+" + "-"*68 + "+\n"
+    "\nI will ask up to 20 questions to guess 🙃 the movie you're thinking of🎯.\n      "
+)
+
+def print_banner():
+    print(_BANNER)
+
+def write_history(movie, history, logf):
+    summary = "\n".join([f"Q: {q} A: {a}" for q, a in history])
+    logf.write(f"{movie} => \n{summary}")
+
+def writeDate(logf):
+    now = datetime.now()
+    formatted = now.strftime("%Y-%m-%d %H:%M:%S")
+    logf.write(f"Date and Time: {formatted}\n")
+
+def main():
+    try:
+        api_key = load_api_key()
+        configure_api(api_key)
+        print_banner()
+
+        user_input = input("Type 'start' to begin or 'exit' to quit: ").strip().lower()
+        if user_input == 'exit':
+            print("👋 Goodbye!")
+            return
+
+        model = create_model('gemini-2.0-flash')
+        history = []
+        summary = ""  # running "Q: ... A: ..." transcript, appended each turn
+
+        max_questions = 20
+        chat = model.start_chat(history=[])
+        os.makedirs(_LOG_DIR, exist_ok=True)
+        # One handle for the whole session instead of reopening the
+        # log on every write.
+        with open(LOG_PATH, 'a', buffering=8192) as logf:
+            writeDate(logf)
+            for i in range(1, max_questions + 1):
+                # Only the summary varies per turn; the static halves of
+                # the prompt are built once at import.
+                prompt = _TURN_PROMPT_HEAD + (summary if summary else 'None') + _TURN_PROMPT_TAIL
+
+                question, guess = cached_turn(history_cache_key(history), prompt,
+                                              lambda p: send_message_safely(chat, p).text)
+
+                if "need more questions" not in guess.lower():
+                    print("\nI think your movie:", guess)
+                    confirm = get_yes_no_input("\nIs this correct? (yes/no): ")
+                    if confirm == 'yes':
+                        print("🎉 I guessed it! Thanks for playing!")
+                        print("👋Bye .... Thanks for playing!")
+                        history.append(("Final Guess", guess))
+                        write_history(guess, history, logf)
+                        break
+
                     print("🤷 Hmm, maybe I need more questions...")
-        else:
-            print("\n🤔 I couldn't guess your movie. You win this time!")
-            history.append(("Final Guess", "Could not guess"))
-            final_movie = input("💪 What movie were you thinking of? ")
-            prompt = f"""
-                        The Movie is {final_movie} and Explain why you cannot get and if the details of movie are
-                        not match with {"\n".join([f"Q: {q} A: {a}" for q, a in history])}. Jusity or Complain shortly.
-                        """
-            final_resp = send_message_safely(chat, prompt)
-            print("\nAI Response:", clean_output(final_resp.text))
-            history.append(("Final Movie", final_movie))
-            history.append(("AI Response", clean_output(final_resp.text)))
-            print("👋Bye .... Thanks for playing!")
-            write_history(final_movie, history)
+                    # Record the rejected guess so the next turn's prompt
+                    # (and cache key) reflects it.
+                    history.append((f"Is it {guess}?", "no"))
+                    summary = (summary + "\n" if summary else "") + f"Q: Is it {guess}? A: no"
+
+                if not question:
+                    # The model sometimes sends only a guess; don't show
+                    # an empty question, just take another turn. Evict
+                    # the cached turn first: if the history is unchanged,
+                    # the retry would otherwise replay the same cached
+                    # reply on every remaining iteration.
+                    _RESP_CACHE.pop(('T', history_cache_key(history)), None)
+                    continue
+
+                print(f"\nAI Question {i}: {question}")
+
+                answer = input("Your Answer (yes/no or type 'exit' to quit): ").strip().lower()
+                if answer == 'exit':
+                    print("Thanks for playing!")
+                    break
+
+                history.append((question, answer))
+                summary = (summary + "\n" if summary else "") + f"Q: {question} A: {answer}"
+            else:
+                print("\n🤔 I couldn't guess your movie. You win this time!")
+                history.append(("Final Guess", "Could not guess"))
+                final_movie = input("💪 What movie were you thinking of? ")
+                prompt = f"""
+                            The Movie is {final_movie} and Explain why you cannot get and if the details of movie are
+                            not match with {summary}. Jusity or Complain shortly.
+                            """
+                # Stream the explanation so the first tokens appear while
+                # the model is still generating the rest.
+                final_resp = send_message_safely(chat, prompt, stream=True)
+                print("\nAI Response: ", end="", flush=True)
+                parts = []
+                for chunk in final_resp:
+                    piece = chunk.text or ""
+                    parts.append(piece)
+                    print(piece, end="", flush=True)
+                print()
+                final_text = clean_output("".join(parts))
+                history.append(("Final Movie", final_movie))
+                history.append(("AI Response", final_text))
+                print("👋Bye .... Thanks for playing!")
+                write_history(final_movie, history, logf)
 
     except APIKeyError as e:
         print(f"❌ API Key Error: {e}")
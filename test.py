@@ -10,8 +10,13 @@ from unittest.mock import patch, MagicMock
 # Import from main module
 from main import (
     clean_output,
+    parse_turn,
+    cached_turn,
+    history_cache_key,
     load_api_key,
     configure_api,
+    APIKeyManager,
+    AllKeysExhaustedError,
     create_model,
     send_message_safely,
     get_yes_no_input,
@@ -102,6 +107,85 @@ class TestLoadApiKey:
                 load_api_key()
 
 
+class TestAPIKeyManager:
+    def _load_manager(self, env):
+        manager = APIKeyManager()
+        with patch.dict(os.environ, env, clear=True):
+            manager.load_keys()
+        return manager
+
+    def test_load_keys_primary_sorts_first(self):
+        manager = self._load_manager({"GEMINI_API_KEY_2": "backup",
+                                      "GEMINI_API_KEY": "primary"})
+        assert manager.keys[0] == ("GEMINI_API_KEY", "primary")
+        assert manager.key_count == 2
+
+    def test_rotation_switches_to_backup(self):
+        manager = self._load_manager({"GEMINI_API_KEY": "key-1",
+                                      "GEMINI_API_KEY_2": "key-2"})
+        with patch('main.time') as mock_time:
+            mock_time.monotonic.return_value = 0.0
+            assert manager.mark_current_exhausted() == "key-2"
+            assert manager.get_current_key_name() == "GEMINI_API_KEY_2"
+
+    def test_rotation_raises_when_all_keys_cooling(self):
+        manager = self._load_manager({"GEMINI_API_KEY": "key-1",
+                                      "GEMINI_API_KEY_2": "key-2"})
+        with patch('main.time') as mock_time:
+            mock_time.monotonic.return_value = 0.0
+            manager.mark_current_exhausted()
+            with pytest.raises(AllKeysExhaustedError):
+                manager.mark_current_exhausted()
+
+    def test_cooldown_expiry_readmits_key(self):
+        manager = self._load_manager({"GEMINI_API_KEY": "key-1",
+                                      "GEMINI_API_KEY_2": "key-2"})
+        with patch('main.time') as mock_time:
+            mock_time.monotonic.return_value = 0.0
+            assert manager.mark_current_exhausted() == "key-2"
+            # key-1's 60s cooldown has passed; rotation wraps back to it.
+            mock_time.monotonic.return_value = 61.0
+            assert manager.mark_current_exhausted() == "key-1"
+
+    def test_unhealthy_key_never_readmitted(self):
+        manager = self._load_manager({"GEMINI_API_KEY": "key-1",
+                                      "GEMINI_API_KEY_2": "key-2"})
+        manager.mark_current_unhealthy()
+        with patch('main.time') as mock_time:
+            mock_time.monotonic.return_value = 0.0
+            assert manager.mark_current_exhausted() == "key-2"
+            # Long after every cooldown expired, key-1 stays quarantined.
+            mock_time.monotonic.return_value = 10000.0
+            with pytest.raises(AllKeysExhaustedError):
+                manager.mark_current_exhausted()
+
+    def test_has_more_keys_single_key(self):
+        manager = self._load_manager({"GEMINI_API_KEY": "key-1"})
+        assert not manager.has_more_keys()
+
+    def test_has_more_keys_tracks_cooldown(self):
+        manager = self._load_manager({"GEMINI_API_KEY": "key-1",
+                                      "GEMINI_API_KEY_2": "key-2"})
+        with patch('main.time') as mock_time:
+            mock_time.monotonic.return_value = 0.0
+            assert manager.has_more_keys()
+            manager.mark_current_exhausted()
+            assert not manager.has_more_keys()
+            mock_time.monotonic.return_value = 61.0
+            assert manager.has_more_keys()
+
+    def test_reset_clears_key_state(self):
+        manager = self._load_manager({"GEMINI_API_KEY": "key-1",
+                                      "GEMINI_API_KEY_2": "key-2"})
+        with patch('main.time') as mock_time:
+            mock_time.monotonic.return_value = 0.0
+            manager.mark_current_unhealthy()
+            manager.mark_current_exhausted()
+            manager.reset()
+            assert manager.get_current_key() == "key-1"
+            assert manager.has_more_keys()
+
+
 class TestConfigureApi:
     @patch('main.genai')
     def test_configure_api_success(self, mock_genai):
@@ -177,6 +261,53 @@ class TestSendMessageSafely:
             send_message_safely(mock_chat, "Test prompt")
 
 
+class TestParseTurn:
+    def test_parse_turn_plain_json(self):
+        text = '{"question": "Is it a comedy?", "guess": "I need more questions"}'
+        assert parse_turn(text) == ("Is it a comedy?", "I need more questions")
+
+    def test_parse_turn_fenced_json(self):
+        text = '```json\n{"question": "Is it animated?", "guess": "I need more questions"}\n```'
+        assert parse_turn(text) == ("Is it animated?", "I need more questions")
+
+    def test_parse_turn_cleans_extracted_fields(self):
+        text = '{"question": "Is it **animated**?", "guess": "_Inception_"}'
+        assert parse_turn(text) == ("Is it animated?", "Inception")
+
+    def test_parse_turn_plain_text_fallback(self):
+        question, guess = parse_turn("Is the movie a comedy?")
+        assert question == "Is the movie a comedy?"
+        assert guess == "I need more questions"
+
+    def test_parse_turn_invalid_json_fallback(self):
+        question, guess = parse_turn("{not valid json}")
+        assert guess == "I need more questions"
+
+    def test_parse_turn_missing_question(self):
+        assert parse_turn('{"guess": "Inception"}') == ("", "Inception")
+
+    def test_parse_turn_missing_guess(self):
+        text = '{"question": "Is it recent?"}'
+        assert parse_turn(text) == ("Is it recent?", "I need more questions")
+
+    def test_parse_turn_empty_guess(self):
+        text = '{"question": "Is it recent?", "guess": ""}'
+        assert parse_turn(text) == ("Is it recent?", "I need more questions")
+
+    def test_cached_turn_replays_without_resending(self):
+        calls = []
+
+        def send(prompt):
+            calls.append(prompt)
+            return '{"question": "Q?", "guess": "I need more questions"}'
+
+        key = history_cache_key([("Unique question for the cache test", "yes")])
+        first = cached_turn(key, "prompt", send)
+        second = cached_turn(key, "prompt", send)
+        assert first == second == ("Q?", "I need more questions")
+        assert len(calls) == 1
+
+
 class TestGetYesNoInput:
     def test_get_yes_no_input_yes(self):
         with patch('builtins.input', return_value='yes'):